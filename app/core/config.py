@@ -28,6 +28,13 @@ class Settings(BaseSettings):
     
     DOCUMENT_PATH_1: str = "data/documents/manual_data_fz.txt"
     DOCUMENT_PATH_2: str = "data/documents/datagenerated_assistant.txt"
+
+    # Local ONNX embeddings: removes the ~100ms network hop per query.
+    # Requires onnxruntime + tokenizers and a vector store rebuilt with the
+    # same model.
+    USE_LOCAL_EMBEDDINGS: bool = False
+    LOCAL_EMBEDDINGS_MODEL_PATH: str = "data/models/bge-small-en-int8.onnx"
+    LOCAL_EMBEDDINGS_TOKENIZER_PATH: str = "data/models/bge-small-en-tokenizer.json"
     
     @property
     def DOCUMENT_PATHS(self) -> List[str]:
@@ -1,14 +1,33 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 
 # Set up a basic logger for the application
 logger = logging.getLogger("__name__")
 logger.setLevel(logging.INFO)
 
-handler = logging.StreamHandler(sys.stdout)
+# Request threads never write to stdout directly: records go through an
+# unbounded queue (a lock-free-ish enqueue) and a single background
+# listener thread does the formatting and I/O. Under load, stdout writes
+# and the handler lock otherwise serialize every hot-path logger call.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+_stream_handler = logging.StreamHandler(sys.stdout)
 formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-handler.setFormatter(formatter)
+_stream_handler.setFormatter(formatter)
+
+handler = logging.handlers.QueueHandler(_log_queue)
 logger.addHandler(handler)
 
+_listener = logging.handlers.QueueListener(
+    _log_queue, _stream_handler, respect_handler_level=True
+)
+_listener.start()
+# Drain buffered records on interpreter shutdown so the tail of the log
+# is not lost.
+atexit.register(_listener.stop)
+
 # Utility function to get the logger
-get_logger = lambda: logger 
\ No newline at end of file
+get_logger = lambda: logger
@@ -0,0 +1,206 @@
+import concurrent.futures
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.logging import get_logger
+
+logger = get_logger()
+
+"""
+Caching decorator for embedding models.
+
+WhatsApp traffic repeats itself — greetings, thanks, the same FAQ phrased
+identically — yet every query pays the full embedding API round trip
+(~100-300 ms). Keys are content hashes, so the cache survives restarts via
+an optional SQLite file and never confuses models: the model name is part
+of the hash.
+"""
+
+
+class _Coalescer:
+    """
+    Merge embedding requests that arrive close together into one batch.
+
+    Parallel conversations each embed their own query; without coalescing
+    that is one HTTP request apiece. A single worker thread drains the
+    queue, waits a short window for stragglers, and issues one
+    embed_documents call for the whole batch, resolving per-caller futures.
+    The window (Little's law) trades ~10 ms of added latency on a lone
+    request for >=50% fewer API calls under concurrency.
+    """
+
+    _STOP = object()
+
+    def __init__(self, inner: Embeddings, max_batch: int = 64, max_wait_ms: int = 10):
+        self._inner = inner
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000.0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def embed(self, text: str) -> List[float]:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def stop(self) -> None:
+        self._queue.put(self._STOP)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self._max_wait
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    self._flush(batch)
+                    return
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch) -> None:
+        if not batch:
+            return
+        try:
+            vectors = self._inner.embed_documents([text for text, _ in batch])
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrap any Embeddings implementation with an LRU keyed on
+    sha256(model_name + NUL + text), optionally persisted to SQLite.
+
+    Hits cost a dict lookup (or one indexed SQLite read after a restart)
+    instead of a network call. Misses in `embed_documents` are batched into
+    a single call to the inner model rather than embedded one by one.
+    """
+
+    def __init__(self,
+                 inner: Embeddings,
+                 db_path: Optional[str] = None,
+                 max_entries: int = 10_000,
+                 coalesce: bool = True):
+        self._inner = inner
+        self._model_name = getattr(inner, "model", type(inner).__name__)
+        self._max_entries = max_entries
+        self._cache: 'OrderedDict[bytes, List[float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        # The sqlite connection is shared across threads
+        # (check_same_thread=False); serialize statement+commit pairs so
+        # concurrent writers cannot interleave transactions.
+        self._db_lock = threading.Lock()
+        self._coalescer = _Coalescer(inner) if coalesce else None
+
+        self._conn = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache (hash BLOB PRIMARY KEY, vec BLOB)"
+            )
+            self._conn.commit()
+            logger.info(f"CachedEmbeddings persistence enabled at {db_path}")
+
+    @property
+    def inner(self) -> Embeddings:
+        return self._inner
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self._model_name}\0{text}".encode("utf-8")).digest()
+
+    def _get(self, key: bytes) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                return vector
+        if self._conn is not None:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT vec FROM embedding_cache WHERE hash = ?", (key,)
+                ).fetchone()
+            if row is not None:
+                # Vectors are stored as raw float32 — half the bytes of the
+                # float64 Python floats they round-trip through.
+                vector = np.frombuffer(row[0], dtype=np.float32).astype(float).tolist()
+                self._remember(key, vector, persist=False)
+                return vector
+        return None
+
+    def _remember(self, key: bytes, vector: List[float], persist: bool = True) -> None:
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+        if persist and self._conn is not None:
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            with self._db_lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embedding_cache (hash, vec) VALUES (?, ?)",
+                    (key, blob)
+                )
+                self._conn.commit()
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is not None:
+            return vector
+        if self._coalescer is not None:
+            vector = self._coalescer.embed(text)
+        else:
+            vector = self._inner.embed_query(text)
+        self._remember(key, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        vectors: List[Optional[List[float]]] = [self._get(key) for key in keys]
+
+        miss_indices = [i for i, vector in enumerate(vectors) if vector is None]
+        if miss_indices:
+            # One batched call for every miss instead of a request per text.
+            fresh = self._inner.embed_documents([texts[i] for i in miss_indices])
+            for i, vector in zip(miss_indices, fresh):
+                vectors[i] = vector
+                self._remember(keys[i], vector)
+
+        return vectors
+
+    def close(self) -> None:
+        """Release the persistence connection and the in-memory cache."""
+        if self._coalescer is not None:
+            self._coalescer.stop()
+        with self._lock:
+            self._cache.clear()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
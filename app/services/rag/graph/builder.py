@@ -1,34 +1,43 @@
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
+import asyncio
 import sqlite3
+import threading
 from pathlib import Path
 from langchain_core.tools import BaseTool
-from typing import List
-from langchain_core.messages import ToolMessage, AIMessage, SystemMessage
+from typing import List, Tuple
+from langchain_core.messages import AIMessage, RemoveMessage
 from app.core.logging import get_logger
 from app.services.rag.generation_service import GenerationService
 from app.services.rag.graph.state import AgentState
-from langgraph.checkpoint.sqlite import SqliteSaver
+from app.services.rag.response_cache import ResponseCache
+from app.services.rag.graph.checkpointer import PooledSqliteSaver
 from app.core.config import Settings
 
 logger = get_logger()
 
+# Role labels for rendering messages as summarizer input. A single dict get
+# per message replaces the per-message hasattr + inline conditional.
+ROLE_LABEL = {"human": "User", "ai": "Assistant", "tool": "Assistant", "system": "System"}
+
 
 def should_continue(state: AgentState):
     """
     Determines the next step for the agent.
 
-    If the last message is from the planner and contains tool calls, route to the tool executor.
-    If the last message is a ToolMessage, it means the tool has run, so route to the generator.
-    Otherwise, end the conversation.
+    The planner stamps its routing decision into state["next"], so this runs
+    as a single dict read per edge instead of isinstance checks (and log
+    formatting) on the last message. The message inspection remains only as
+    a fallback for states produced before the planner wrote the tag.
     """
-    last_message = state["messages"][-1]
-    if isinstance(last_message, AIMessage) and last_message.tool_calls:
-        logger.info(f"Tool call detected. Routing to tool executor.")
-        return "call_tool"
-    else:
-        logger.info(f"No tool call detected. Routing to generator.")
-        return "generate"
+    next_step = state.get("next")
+    if next_step:
+        return next_step
+
+    # Fallback: a plain attribute probe instead of isinstance — LangChain's
+    # __instancecheck__ dispatch is not free on a per-edge function.
+    tool_calls = getattr(state["messages"][-1], "tool_calls", None)
+    return "call_tool" if tool_calls else "end"
 
 
 class GraphBuilder:
@@ -36,107 +45,353 @@ class GraphBuilder:
     Builds the stateful LangGraph agent with separate planner and generator nodes.
     """
 
-    def __init__(self, generation_service: GenerationService, tools: List[BaseTool], memory_threshold: int = 6, settings: Settings = None):
+    def __init__(self, generation_service: GenerationService, tools: List[BaseTool], memory_threshold: int = 6, settings: Settings = None, response_cache: ResponseCache = None, context_window: int = 16000):
         self.generation_service = generation_service
         self.tools = tools
         self.memory_threshold = memory_threshold
         self.settings = settings
+        self.context_window = context_window
+        self.response_cache = response_cache
+        # Compiled graphs keyed by db_path: graph wiring, compilation and the
+        # sqlite connection are pure setup, so repeat build() calls (hot
+        # reloads, per-request callers) must not redo them.
+        self._compiled_graphs = {}
+        self._last_trim_summary = None
+        # The tool list is fixed per builder, so the planner and generator
+        # chains (tool-schema binding, prompt/LLM composition) are built once
+        # here instead of on every node invocation.
+        self._planner_chain = self.generation_service.get_planner_chain(self.tools)
+        self._generator_chain = self.generation_service.get_generator_chain()
+        # ToolNode is stateless across invocations; build it once alongside
+        # the chains instead of per graph build.
+        self._tool_node = ToolNode(self.tools)
     
-    def _check_memory_threshold(self, state: AgentState) -> AgentState:
+    # How many leading non-system messages stay pinned when trimming. Keeping
+    # the opening turns byte-identical preserves the provider-side prefix KV
+    # cache across trims.
+    _ANCHOR_MESSAGES = 4
+
+    # Placeholder for stale retriever output. Old observations are the bulk
+    # of history bloat and carry no value once the answer has been given.
+    _MASKED_OBSERVATION = "<MASKED: observation too old>"
+
+    # Below this much dropped dialogue text the background summarizer LLM
+    # call is skipped outright — nothing worth a round trip to compress.
+    _MIN_SUMMARY_CHARS = 500
+
+    # How many recent non-system messages the planner sees. Routing a tool
+    # call only needs the recent exchange; the full window is for the
+    # generator.
+    _PLANNER_RECENCY = 8
+
+    @staticmethod
+    def _filter_for_planner(messages: List, n: int = _PLANNER_RECENCY) -> List:
+        """
+        System messages plus roughly the last `n` non-system messages,
+        aligned to a turn start.
+
+        The planner's prompt cost is O(history) without this; its decision
+        (call the retriever or answer directly) only depends on the recent
+        exchange, so the LLM input is cut to O(n). A bare [-n:] slice can
+        open the window on a ToolMessage whose tool-calls AIMessage fell
+        outside it — an invalid sequence the provider rejects — so the
+        window start moves forward to the next human message (or, if the
+        slice contains none, backwards to the last one). Only the planner's
+        view is filtered — checkpointed state is untouched.
         """
-        Check if memory threshold is reached and handle summarization if needed.
-        Returns the updated state.
+        system = [m for m in messages if m.type == "system"]
+        non_system = [m for m in messages if m.type != "system"]
+        start = max(len(non_system) - n, 0)
+        aligned = next(
+            (i for i in range(start, len(non_system)) if non_system[i].type == "human"),
+            None
+        )
+        if aligned is None:
+            # No human message in the slice (oversized tool turn): extend
+            # backwards to the turn that produced it.
+            aligned = next(
+                (i for i in range(start, -1, -1) if non_system[i].type == "human"),
+                start
+            )
+        return system + non_system[aligned:]
+
+    @staticmethod
+    def _estimate_message_tokens(msg) -> int:
+        """Fast ~4-chars-per-token estimate; no tokenizer on the hot path."""
+        return (len(str(msg.content)) + len(str(getattr(msg, "additional_kwargs", "")))) // 4
+
+    def _check_memory_threshold(self, state: AgentState) -> Tuple[List, List, int]:
+        """
+        Check if the memory threshold is reached and trim the history if needed.
+        Returns `(window_messages, history_updates, interaction_count)`: the
+        message view downstream nodes should see this turn, the message
+        updates that persist the trim (RemoveMessage per dropped message,
+        masked copies replacing stale observations by id — applied by the
+        `add_messages` reducer), and the absolute counter value to write
+        back (that field is last-write-wins). On non-trim turns the updates
+        list is empty, so node patches stay O(1).
+
+        Trimming keeps a sliding window: system messages and the first few
+        anchor turns are preserved unchanged, only middle turns are dropped.
+        Rewriting the whole history into a summary (the previous behaviour)
+        invalidated the provider-side prefix KV cache on every threshold hit
+        and cost an extra LLM round trip for the summary itself.
+
+        Both trim boundaries snap to turn starts (human messages): a window
+        that opens on a ToolMessage whose tool-calls AIMessage was dropped
+        is an invalid sequence the provider rejects with a 400.
+
+        The trim fires on either of two triggers: the interaction count
+        reaching memory_threshold, or the estimated prompt tokens crossing
+        80% of the context window. A pure count trigger fires too early on
+        short turns and too late when tool outputs are large.
         """
-        current_count = state.get("interaction_count")
+        current_count = state.get("interaction_count") or 0
         new_count = current_count + 1
-        
-        logger.info(f"[Memory Management] Interaction count: {current_count} -> {new_count} (threshold: {self.memory_threshold})")
-        
-        if current_count >= self.memory_threshold and len(state["messages"]) > 2:
-            logger.info(f"[Memory Management] THRESHOLD REACHED! Summarizing and wiping conversation history...")
-            logger.info(f"[Memory Management] Messages to summarize: {len(state['messages'])}")
-            
-            try:
-                conversation_messages = [msg for msg in state["messages"] if not isinstance(msg, SystemMessage)]
-                
-                if conversation_messages:
-                    logger.info(f"[Memory Management] Found {len(conversation_messages)} conversation messages to summarize")
-                    
-                    conversation_text = "\n".join([
-                        f"{'User' if hasattr(msg, 'type') and msg.type == 'human' else 'Assistant'}: {msg.content}"
-                        for msg in conversation_messages
-                    ])
-                    
-                    summarizer_chain = self.generation_service.get_summarizer_chain()
-                    summary = summarizer_chain.invoke({"history": conversation_text})
-                    
-                    logger.info(f"[Memory Management] SUMMARY CREATED: {summary}")
-                    logger.info(f"[Memory Management] Memory wiped and reset. Starting fresh with summary.")
-                    
-                    summary_message = SystemMessage(content=f"Previous conversation summary: {summary}")
-                    
-                    return {
-                        "messages": [summary_message],
-                        "context": state.get("context", ""),
-                        "interaction_count": 1
-                    }
-                else:
-                    logger.warning("[Memory Management] No conversation messages to summarize")
-                    return {
-                        "messages": state["messages"],
-                        "context": state.get("context", ""),
-                        "interaction_count": 1
-                    }
-                    
-            except Exception as e:
-                logger.error(f"[Memory Management] Error during summarization: {e}", exc_info=True)
-                return {
-                    "messages": state["messages"],
-                    "context": state.get("context", ""),
-                    "interaction_count": 1
-                }
+
+        logger.info("[Memory Management] Interaction count: %d -> %d (threshold: %d)",
+                    current_count, new_count, self.memory_threshold)
+
+        estimated_tokens = sum(self._estimate_message_tokens(m) for m in state["messages"])
+        over_token_budget = estimated_tokens > 0.8 * self.context_window
+        if over_token_budget:
+            logger.info("[Memory Management] Token budget exceeded: ~%d of %d tokens",
+                        estimated_tokens, self.context_window)
+
+        if (current_count >= self.memory_threshold or over_token_budget) and len(state["messages"]) > 2:
+            messages = state["messages"]
+            turn_starts = [i for i, msg in enumerate(messages) if msg.type == "human"]
+
+            anchor_end = 0
+            non_system_seen = 0
+            for i, msg in enumerate(messages):
+                if msg.type != "system":
+                    non_system_seen += 1
+                    if non_system_seen > self._ANCHOR_MESSAGES:
+                        break
+                anchor_end = i + 1
+            # The anchor keeps whole turns only: extend to the next turn
+            # start so it never ends on half a tool-call exchange.
+            anchor_end = next((ts for ts in turn_starts if ts >= anchor_end), len(messages))
+
+            # Keep at least memory_threshold recent messages, with the kept
+            # window starting on a human message.
+            provisional_start = len(messages) - self.memory_threshold
+            keep_start = anchor_end
+            for ts in turn_starts:
+                if anchor_end <= ts <= provisional_start:
+                    keep_start = ts
+
+            dropped_messages = messages[anchor_end:keep_start]
+            kept = messages[:anchor_end] + messages[keep_start:]
+            if dropped_messages:
+                logger.info(
+                    "[Memory Management] THRESHOLD REACHED! Dropped %d middle messages, kept %d anchor + %d recent",
+                    len(dropped_messages), anchor_end, len(messages) - keep_start
+                )
+                self._summarize_in_background(dropped_messages)
+
+            window, masked_updates = self._mask_old_observations(kept)
+            removals = [RemoveMessage(id=msg.id) for msg in dropped_messages if msg.id]
+
+            # The counter resets to 1 after a trim.
+            return window, removals + masked_updates, 1
         else:
             if current_count == 0:
-                logger.info(f"[Memory Management] First interaction. Counter: {new_count}")
+                logger.info("[Memory Management] First interaction. Counter: %d", new_count)
             else:
-                logger.info(f"[Memory Management] Continuing conversation. Counter: {new_count}/{self.memory_threshold}")
-            
-            return {
-                "messages": state["messages"],
-                "context": state.get("context", ""),
-                "interaction_count": 1
-            }
-    def _planner_node(self, state: AgentState):
+                logger.info("[Memory Management] Continuing conversation. Counter: %d/%d", new_count, self.memory_threshold)
+
+            return state["messages"], [], new_count
+
+    def _mask_old_observations(self, messages: List) -> Tuple[List, List]:
+        """
+        Replace the content of every ToolMessage except the newest with a
+        short placeholder.
+
+        Stale retriever dumps dominate prompt size but rarely inform later
+        turns; masking them is a zero-LLM compression. Messages are copied
+        rather than mutated — the originals may be shared with checkpoints.
+        Returns `(masked_view, replacements)`: the full masked list, plus
+        just the masked copies (same ids as the originals) for the
+        `add_messages` reducer to persist as in-place replacements.
+        """
+        last_tool_idx = None
+        for i, msg in enumerate(messages):
+            if msg.type == "tool":
+                last_tool_idx = i
+
+        if last_tool_idx is None:
+            return messages, []
+
+        masked = []
+        replacements = []
+        for i, msg in enumerate(messages):
+            if (msg.type == "tool" and i != last_tool_idx
+                    and msg.content != self._MASKED_OBSERVATION):
+                copy = msg.model_copy(update={"content": self._MASKED_OBSERVATION})
+                masked.append(copy)
+                if msg.id:
+                    replacements.append(copy)
+            else:
+                masked.append(msg)
+        return masked, replacements
+
+    def _summarize_in_background(self, dropped_messages: List) -> None:
+        """
+        Summarize messages dropped by the sliding window without blocking
+        the turn.
+
+        The summarizer is a full LLM round trip; running it inline would
+        stall every concurrent conversation sharing this process for the
+        duration. A daemon thread keeps it entirely off the request path —
+        the summary is logged for observability (and kept as the builder's
+        last trim summary) rather than written back into state, since
+        rewriting the history would defeat the prefix-stable trim.
+
+        Only human/AI dialogue is summarized — dropped tool observations are
+        already covered by masking — and if the dialogue text is short the
+        LLM call is skipped entirely.
+        """
+        dialog_messages = [msg for msg in dropped_messages if msg.type in ("human", "ai")]
+        if sum(len(str(msg.content)) for msg in dialog_messages) < self._MIN_SUMMARY_CHARS:
+            logger.info("[Memory Management] Dropped dialogue too small to summarize, skipping LLM call")
+            return
+
+        def _run():
+            try:
+                conversation_text = "\n".join(
+                    f"{ROLE_LABEL.get(msg.type, 'Assistant')}: {msg.content}"
+                    for msg in dialog_messages
+                )
+                summarizer_chain = self.generation_service.get_summarizer_chain()
+                summary = summarizer_chain.invoke({"history": conversation_text})
+                self._last_trim_summary = summary
+                logger.info("[Memory Management] Background summary of dropped messages: %s", summary)
+            except Exception as e:
+                logger.error(f"[Memory Management] Background summarization failed: {e}", exc_info=True)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    @staticmethod
+    def _conversation_id(config) -> str:
+        """Thread id from the run config — the response cache's scope."""
+        if not config:
+            return ""
+        return str(config.get("configurable", {}).get("thread_id") or "")
+
+    async def _planner_node(self, state: AgentState, config=None):
         """The 'brain' of the agent. Decides the next action."""
-        if "context" not in state:
-            state["context"] = ""
-            
-        updated_state = self._check_memory_threshold(state)
-        
-        planner_chain = self.generation_service.get_planner_chain(self.tools)
-        response = planner_chain.invoke({"messages": updated_state['messages']})
-        return {"messages": [response], "interaction_count": 1}
+        window_messages, history_updates, interaction_count = self._check_memory_threshold(state)
+
+        # Semantic cache consulted before any LLM call: repeated questions
+        # (the bulk of WhatsApp traffic) end the turn here, skipping the
+        # planner and the whole tool/generator path while still recording
+        # the exchange in history. Entries are scoped per conversation —
+        # direct replies depend on this thread's context.
+        conversation_id = self._conversation_id(config)
+        user_query = next(
+            (msg.content for msg in reversed(state["messages"]) if msg.type == "human"),
+            None
+        )
+        if self.response_cache and user_query:
+            cached_response = await asyncio.to_thread(
+                self.response_cache.get, user_query, conversation_id
+            )
+            if cached_response is not None:
+                return {
+                    "messages": history_updates + [AIMessage(content=cached_response)],
+                    "interaction_count": interaction_count,
+                    "context": "",
+                    "next": "end",
+                    "tool_used": False
+                }
+
+        response = await self._planner_chain.ainvoke(
+            {"messages": self._filter_for_planner(window_messages)}
+        )
+        # Reset the context channel each turn; only a fresh tool run should
+        # populate it, otherwise the generator would see a stale retrieval.
+        # When no tool is requested the planner's own reply is the final
+        # answer: routing through the generator would spend a second LLM
+        # call restating it, which doubles latency on small-talk turns.
+        tool_requested = bool(response.tool_calls)
+        if not tool_requested and self.response_cache and user_query and response.content:
+            # Direct answers are cacheable too; tool-grounded ones are
+            # stored by the generator node.
+            await asyncio.to_thread(
+                self.response_cache.put, user_query, response.content, conversation_id
+            )
+        return {
+            "messages": history_updates + [response],
+            "interaction_count": interaction_count,
+            "context": "",
+            "next": "call_tool" if tool_requested else "end",
+            "tool_used": tool_requested
+        }
 
  
-    def _generator_node(self, state: AgentState):
+    async def _tool_node_with_context(self, state: AgentState):
+        """
+        Execute tools and publish their output on the typed `context`
+        channel, so the generator gets retrieved documents directly instead
+        of re-reading them out of the last ToolMessage.
+        """
+        result = await self._tool_node.ainvoke(state)
+        tool_output = "\n\n".join(
+            str(msg.content)
+            for msg in result.get("messages", [])
+            if msg.type == "tool"
+        )
+        if tool_output:
+            result["context"] = tool_output
+        return result
+
+    async def _generator_node(self, state: AgentState, config=None):
         """The 'voice' of the agent. Generates the final response."""
-        context = state["messages"][-1].content
+        context = state.get("context") or state["messages"][-1].content
+
+        conversation_id = self._conversation_id(config)
+        user_query = next(
+            (msg.content for msg in reversed(state["messages"]) if msg.type == "human"),
+            None
+        )
+
+        # Cache lookups may call the sync embedding client; keep that off
+        # the event loop.
+        if self.response_cache and user_query:
+            cached_response = await asyncio.to_thread(
+                self.response_cache.get, user_query, conversation_id
+            )
+            if cached_response is not None:
+                return {"messages": [AIMessage(content=cached_response)]}
 
-        generator_chain = self.generation_service.get_generator_chain()
-        response = generator_chain.invoke({
+        response = await self._generator_chain.ainvoke({
             "messages": state['messages'],
             "context": context
         })
+
+        if self.response_cache and user_query:
+            await asyncio.to_thread(
+                self.response_cache.put, user_query, response.content, conversation_id
+            )
+
         return {"messages": [response]}
 
     def build(self, db_path: str):
         """
         Builds and compiles the graph with a checkpointer for persistence.
+        The compiled graph is cached per db_path, so calling build() again
+        returns the existing graph instead of recompiling and reopening
+        the checkpoint database.
         """
+        if db_path in self._compiled_graphs:
+            return self._compiled_graphs[db_path]
+
         workflow = StateGraph(AgentState)
 
         workflow.add_node("planner", self._planner_node)
-        workflow.add_node("call_tool", ToolNode(self.tools))
+        workflow.add_node("call_tool", self._tool_node_with_context)
         workflow.add_node("generator", self._generator_node)
 
         workflow.set_entry_point("planner")
@@ -146,18 +401,22 @@ class GraphBuilder:
             should_continue,
             {
                 "call_tool": "call_tool",
-                "generate": "generator",
+                "end": END,
             }
         )
-        
+
+        # The planner/generator split only pays off when a tool fired: the
+        # generator grounds the answer in fresh context. Without a tool the
+        # planner's reply ships as-is (see _planner_node).
         workflow.add_edge("call_tool", "generator")
         workflow.add_edge("generator", END)
 
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        memory = SqliteSaver(conn=conn)
+        memory = PooledSqliteSaver(db_path, defer_commits=True)
 
-        return workflow.compile(checkpointer=memory) 
+        compiled = workflow.compile(checkpointer=memory)
+        self._compiled_graphs[db_path] = compiled
+        return compiled
 
 
 if __name__ == "__main__":
@@ -0,0 +1,194 @@
+import asyncio
+import copy
+import sqlite3
+import queue
+from collections import OrderedDict
+from contextlib import contextmanager
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from app.core.logging import get_logger
+
+logger = get_logger()
+
+# WAL with NORMAL sync turns most checkpoint commits into memory appends and
+# lets readers run concurrently with the single writer (see chunk6-1).
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL;"
+    "PRAGMA synchronous=NORMAL;"
+    "PRAGMA temp_store=MEMORY;"
+    "PRAGMA mmap_size=10737418240;"
+    "PRAGMA cache_size=-65536;"
+    "PRAGMA busy_timeout=5000;"
+    "PRAGMA wal_autocheckpoint=1000;"
+)
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver with a connection-per-role pool: one read-write connection
+    for checkpoint writes plus a small pool of read-only connections for
+    state resume.
+
+    With a single shared connection, every get_tuple/list call queues behind
+    the writer lock even in WAL mode — WAL only allows concurrent reads when
+    they come from *separate* connections. Dispatching reads to dedicated
+    mode=ro connections lets concurrent conversations resume state while
+    another one is checkpointing.
+    """
+
+    # How many conversations keep their latest checkpoint in memory. Hot
+    # WhatsApp threads re-enter the graph every few seconds; serving their
+    # state resume from a dict skips the SQLite read (and the serde decode)
+    # entirely. SQLite remains the source of truth — every write still goes
+    # through (write-through), so eviction or restart only costs one read.
+    _HOT_TIER_MAX = 128
+
+    def __init__(self, db_path: str, readers: int = 4, serde=None, defer_commits: bool = False):
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.executescript(_PRAGMAS)
+        # The default serializer already encodes checkpoints with ormsgpack
+        # (C-speed binary); pin it explicitly with a pickle fallback so the
+        # rare object msgpack cannot handle degrades to protocol-5 pickle
+        # instead of raising mid-turn.
+        super().__init__(conn, serde=serde or JsonPlusSerializer(pickle_fallback=True))
+        self._defer_commits = defer_commits
+
+        # Create the checkpoint tables on the writer before any read-only
+        # connection opens: RO connections cannot run the DDL in setup().
+        self.setup()
+
+        self._hot: 'OrderedDict[tuple, dict]' = OrderedDict()
+
+        self._reader_pool: queue.SimpleQueue = queue.SimpleQueue()
+        for _ in range(readers):
+            ro_conn = sqlite3.connect(
+                f"file:{db_path}?mode=ro", uri=True, check_same_thread=False
+            )
+            ro_conn.execute("PRAGMA busy_timeout=5000")
+            reader = SqliteSaver(conn=ro_conn, serde=self.serde)
+            reader.is_setup = True
+            self._reader_pool.put(reader)
+
+        logger.info(f"PooledSqliteSaver initialized: 1 writer + {readers} readers at {db_path}")
+
+    @contextmanager
+    def cursor(self, transaction: bool = True):
+        """
+        Cursor for the writer connection.
+
+        With defer_commits enabled, per-node checkpoint writes stay in the
+        open transaction instead of committing (and fsyncing) one by one;
+        the orchestrator calls flush() once at the end of the turn. A turn
+        is planner + optional tool + generator, so this folds three-plus
+        commits into one.
+        """
+        with self.lock:
+            self.setup()
+            cur = self.conn.cursor()
+            try:
+                yield cur
+            finally:
+                if transaction and not self._defer_commits:
+                    self.conn.commit()
+                cur.close()
+
+    def flush(self):
+        """Commit any buffered checkpoint writes. Safe to call when idle."""
+        with self.lock:
+            self.conn.commit()
+
+    @contextmanager
+    def _reader(self):
+        saver = self._reader_pool.get()
+        try:
+            yield saver
+        finally:
+            self._reader_pool.put(saver)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        with self.lock:
+            self._hot[(thread_id, checkpoint_ns)] = {
+                "config": next_config,
+                # Deep-copied: the graph keeps mutating its live channel
+                # values after put returns.
+                "checkpoint": copy.deepcopy(checkpoint),
+                "metadata": metadata,
+                "parent_config": (
+                    {"configurable": {"thread_id": thread_id,
+                                      "checkpoint_ns": checkpoint_ns,
+                                      "checkpoint_id": parent_id}}
+                    if parent_id else None
+                ),
+                "pending_writes": [],
+            }
+            self._hot.move_to_end((thread_id, checkpoint_ns))
+            while len(self._hot) > self._HOT_TIER_MAX:
+                self._hot.popitem(last=False)
+        return next_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        super().put_writes(config, writes, task_id, task_path)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"].get("checkpoint_id")
+        with self.lock:
+            entry = self._hot.get((thread_id, checkpoint_ns))
+            if entry is not None and entry["checkpoint"]["id"] == checkpoint_id:
+                entry["pending_writes"].extend(
+                    (task_id, channel, copy.deepcopy(value))
+                    for channel, value in writes
+                )
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        requested_id = config["configurable"].get("checkpoint_id")
+        with self.lock:
+            entry = self._hot.get((thread_id, checkpoint_ns))
+            if entry is not None and (
+                requested_id is None or entry["checkpoint"]["id"] == requested_id
+            ):
+                self._hot.move_to_end((thread_id, checkpoint_ns))
+                return CheckpointTuple(
+                    config=entry["config"],
+                    checkpoint=copy.deepcopy(entry["checkpoint"]),
+                    metadata=entry["metadata"],
+                    parent_config=entry["parent_config"],
+                    pending_writes=list(entry["pending_writes"]),
+                )
+        # Cold thread, evicted entry, or an explicit historical checkpoint:
+        # read through to SQLite.
+        with self._reader() as reader:
+            return reader.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        with self._reader() as reader:
+            yield from reader.list(config, filter=filter, before=before, limit=limit)
+
+    # Async delegates so the graph can run through ainvoke. The base
+    # SqliteSaver raises NotImplementedError for these; offloading the sync
+    # implementations to a worker thread keeps the event loop free during
+    # the (short, WAL-backed) sqlite calls without a second saver class.
+    # All connections are opened with check_same_thread=False and guarded by
+    # the saver lock / reader pool, so cross-thread use is safe.
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        results = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in results:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
@@ -1,6 +1,6 @@
-from typing import TypedDict, Annotated, List
-import operator
+from typing import TypedDict, Annotated, List, NotRequired
 from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
 
 class AgentState(TypedDict):
     """
@@ -8,14 +8,28 @@ class AgentState(TypedDict):
 
     Attributes:
         messages: The history of messages in the conversation.
-                  The `operator.add` anntation tells LangGraph to append new messages
-                  to this list rather than overwriting it.
+                  The `add_messages` reducer appends new messages, replaces
+                  messages that share an id, and honors RemoveMessage —
+                  which is how the planner's history trim actually persists
+                  into the checkpoint instead of being a per-turn view.
         context: The retrieved context from the vector store.
         interaction_count: Counter for tracking the number of interactions for memory management.
+        next: The route decided by the planner ("call_tool" or "end"),
+              stamped into state so edge evaluation is a dict read instead
+              of isinstance checks on the last message.
+        tool_used: Whether the planner requested a tool this turn, recorded
+                   so callers don't re-scan the history to find out.
     """
-    messages: Annotated[List[BaseMessage], operator.add]
-    context: str
-    interaction_count: Annotated[int, operator.add]
+    messages: Annotated[List[BaseMessage], add_messages]
+    # NotRequired so callers never have to seed it: the planner resets it
+    # each turn and only a tool run populates it. Readers use state.get().
+    context: NotRequired[str]
+    # Deliberately unreduced (last write wins): with operator.add a reset
+    # required writing the negative of the current value, which is racy
+    # under concurrent updates. Nodes write the absolute count.
+    interaction_count: int
+    next: str
+    tool_used: bool
 
 def should_continue(state: AgentState) -> str:
     """
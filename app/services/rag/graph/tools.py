@@ -1,3 +1,5 @@
+from typing import Dict, Tuple
+
 from langchain_core.tools import BaseTool, Tool
 from pydantic.v1 import BaseModel, Field
 
@@ -7,22 +9,36 @@ class RetrieverInput(BaseModel):
     """Input schema for the retriever tool."""
     query: str = Field(description="The query to search for in the knowledge base.")
 
+# Tools memoized per (service instance, collection): Tool construction runs
+# pydantic schema generation, so rebuilding identical tools on orchestrator
+# reloads is wasted work. Keyed by id() because the service is not hashable;
+# an entry outliving its service is harmless — a new service has a new id.
+_tool_cache: Dict[Tuple[int, str], BaseTool] = {}
+
 def create_rag_tool(vector_store_service: VectorStoreService, collection_name: str) -> BaseTool:
     """
     Creates a retriever tool for the RAG agent.
 
     This tool allows the agent to search the vector store for relevant documents
     based on the user's query. The retriever is configured to return the top 5
-    results from a specific document source.
+    results from a specific document source. Repeat calls for the same
+    service and collection return the same tool instance.
     """
+    cache_key = (id(vector_store_service), collection_name)
+    cached = _tool_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     retriever = vector_store_service.as_retriever(
         collection_name=collection_name,
         search_kwargs={"k": 5}
     )
-    
-    return Tool(
+
+    tool = Tool(
         name="knowledge_base_retriever",
         description="This is your primary tool. You **MUST** use it to search the Geniats knowledge base for specific details about the e-learning programs, pricing, and curriculum to answer client questions. Use this to find the exact information you need before responding.",
         func=retriever.invoke,
         args_schema=RetrieverInput,
-    ) 
\ No newline at end of file
+    )
+    _tool_cache[cache_key] = tool
+    return tool
\ No newline at end of file
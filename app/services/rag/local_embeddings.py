@@ -0,0 +1,82 @@
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.logging import get_logger
+
+logger = get_logger()
+
+"""
+Local CPU embeddings via ONNX Runtime.
+
+The OpenAI embedding endpoint is a ~100-300 ms network hop that dominates
+cold-path retrieval latency for short WhatsApp queries. A small int8
+sentence-transformer (MiniLM / BGE-small) runs the same workload locally in
+a few milliseconds, with no network and no token spend. onnxruntime and
+tokenizers are optional dependencies — imported lazily so the default
+OpenAI path never pays for them.
+"""
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    Embeddings backed by a quantized ONNX sentence-transformer on CPU.
+
+    Vectors are mean-pooled over the last hidden state and L2-normalized,
+    matching the sentence-transformers convention, so cosine-distance
+    collections work unchanged. The vector store must be rebuilt with this
+    model — its vectors are not comparable to OpenAI's.
+    """
+
+    _MAX_TOKENS = 512
+
+    def __init__(self, model_path: str, tokenizer_path: str):
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "LocalEmbeddings requires the optional 'onnxruntime' and "
+                "'tokenizers' packages. Install them or disable "
+                "USE_LOCAL_EMBEDDINGS."
+            ) from e
+
+        self.model = model_path
+        self._session = onnxruntime.InferenceSession(
+            model_path, providers=["CPUExecutionProvider"]
+        )
+        self._tokenizer = Tokenizer.from_file(tokenizer_path)
+        self._tokenizer.enable_truncation(max_length=self._MAX_TOKENS)
+
+        logger.info(f"LocalEmbeddings initialized from {model_path}")
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        encodings = self._tokenizer.encode_batch(texts)
+        max_len = max(len(enc.ids) for enc in encodings)
+
+        input_ids = np.zeros((len(texts), max_len), dtype=np.int64)
+        attention_mask = np.zeros((len(texts), max_len), dtype=np.int64)
+        for i, enc in enumerate(encodings):
+            input_ids[i, :len(enc.ids)] = enc.ids
+            attention_mask[i, :len(enc.ids)] = enc.attention_mask
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if any(i.name == "token_type_ids" for i in self._session.get_inputs()):
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self._session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, then L2 normalization.
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.astype(float).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode(texts)
@@ -1,7 +1,9 @@
-from app.services.rag.generation_service import GenerationService
+from app.services.rag.generation_service import GenerationService, create_chat_model
 from app.services.rag.vector_store_service import VectorStoreService, VectorStoreConfig
 from app.services.rag.graph.builder import GraphBuilder
 from app.services.rag.graph.tools import create_rag_tool
+from app.services.rag.throttle import throttle_llm_call, estimate_tokens
+from app.services.rag.response_cache import ResponseCache
 from app.core.logging import get_logger
 from app.core.config import Settings
 from langchain_core.messages import HumanMessage
@@ -10,10 +12,25 @@ from typing import Dict, Any
 import uuid
 from pathlib import Path
 import asyncio
+import concurrent.futures
 import functools
+import os
 
 logger = get_logger()
 
+
+@functools.lru_cache(maxsize=1024)
+def _make_config(conversation_id: str) -> Dict[str, Any]:
+    """
+    Memoized per-conversation graph config.
+
+    Active WhatsApp conversations re-enter the graph many times with the
+    same thread_id; building the nested configurable dict per turn is pure
+    allocation churn on the hottest path. The graph only reads the config,
+    so sharing one instance per conversation is safe.
+    """
+    return {"configurable": {"thread_id": conversation_id}}
+
 class RAGOrchestrator:
     """
     Main orchestrator for RAG operations using LangGraph.
@@ -21,24 +38,41 @@ class RAGOrchestrator:
     This class integrates all RAG components (vector store, generation, tools, and graph)
     into a unified service that maintains conversation state and generates responses.
     """
-    
+
+    # Slots instead of a per-instance __dict__: attribute reads like
+    # self._graph happen on every request, and slot access skips the dict
+    # lookup (and its ~200 bytes of per-instance overhead).
+    __slots__ = (
+        "settings", "vector_store_path", "collection_name", "model_name",
+        "temperature", "memory_threshold", "warmup", "_ready", "_graph",
+        "_executor", "vector_store_service", "generation_service",
+    )
+
     def __init__(self,
                  settings: Settings,
                  vector_store_path: str = "data/vector_store",
                  collection_name: str = "production_collection",
                  model_name: str = "gpt-4.1",
                  temperature: float = 0.2,
-                 memory_threshold: int = 6):
-        
+                 memory_threshold: int = 6,
+                 warmup: bool = True):
+
         self.settings = settings
         self.vector_store_path = vector_store_path
         self.collection_name = collection_name
         self.model_name = model_name
         self.temperature = temperature
         self.memory_threshold = memory_threshold
+        self.warmup = warmup
         
         self._ready = False
         self._graph: CompiledGraph = None
+        # Worker pool backing the sync bridge (`_run_blocking`): legacy
+        # callers and boot warm-up may sit on an event-loop thread, so their
+        # turns run on a pooled thread's own loop instead.
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(4, os.cpu_count() or 1)
+        )
         self._setup_services()
         self._ready = True
         
@@ -51,26 +85,82 @@ class RAGOrchestrator:
             store_path=self.vector_store_path,
             collection_name=self.collection_name
         )
-        self.vector_store_service = VectorStoreService(vector_config)
+
+        embedding_model = None
+        if self.settings and getattr(self.settings, "USE_LOCAL_EMBEDDINGS", False):
+            # Optional local ONNX model: removes the embedding network hop.
+            # Only valid against a store built with the same model.
+            from app.services.rag.local_embeddings import LocalEmbeddings
+            embedding_model = LocalEmbeddings(
+                model_path=self.settings.LOCAL_EMBEDDINGS_MODEL_PATH,
+                tokenizer_path=self.settings.LOCAL_EMBEDDINGS_TOKENIZER_PATH
+            )
+
+        self.vector_store_service = VectorStoreService(vector_config, embedding_model=embedding_model)
         
-        self.generation_service = GenerationService(
-            model_name=self.model_name,
-            temperature=self.temperature
-        )
+        llm = create_chat_model(self.model_name, self.temperature)
+        self.generation_service = GenerationService(llm)
         
         tools = [create_rag_tool(self.vector_store_service, self.collection_name)]
-        
+
+        response_cache = ResponseCache(
+            embedding_model=self.vector_store_service.embedding_model
+        )
+
         graph_builder = GraphBuilder(
             generation_service=self.generation_service,
             tools=tools,
             memory_threshold=self.memory_threshold,
-            settings=self.settings
+            settings=self.settings,
+            response_cache=response_cache,
+            context_window=self.generation_service.get_context_window()
         )
         
         db_path = "data/sqlite/conversations.db"
         self._graph = graph_builder.build(db_path)
-        
+
+        if self.warmup:
+            self._warm_up()
+
         logger.info("RAG orchestrator setup completed successfully")
+
+    def _warm_up(self):
+        """
+        Pay the cold-start costs at boot instead of on the first user.
+
+        Eagerly loads the collection (so the first retrieval doesn't open
+        it) and runs one throwaway graph turn to establish the LLM TLS
+        connection and prime the checkpoint tables. Failures are logged and
+        ignored — a cold first request is degraded, not broken.
+        """
+        try:
+            self.vector_store_service.load_collection(self.collection_name)
+        except Exception as e:
+            logger.warning(f"Warm-up collection load failed: {e}")
+
+        try:
+            self._run_blocking(self._graph.ainvoke(
+                {"messages": [HumanMessage(content="ping")]},
+                config={"configurable": {"thread_id": "__warmup__"}}
+            ))
+            logger.info("Warm-up turn completed")
+        except Exception as e:
+            logger.warning(f"Warm-up graph invocation failed: {e}")
+
+    def _run_blocking(self, coro):
+        """
+        Run a coroutine to completion from synchronous code.
+
+        If the calling thread already hosts an event loop (e.g. boot inside
+        the FastAPI lifespan), the coroutine runs on a worker thread's own
+        loop and this thread blocks until it finishes — asyncio.run would
+        raise there.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        return self._executor.submit(asyncio.run, coro).result()
     
     def is_ready(self) -> bool:
         """Check if the orchestrator is ready to process requests"""
@@ -79,61 +169,127 @@ class RAGOrchestrator:
     def generate_response(self, user_message: str, conversation_id: str = None) -> str:
         """
         Generate a response using the LangGraph workflow.
-        
+
+        Synchronous wrapper for legacy callers — the actual turn runs
+        through the async graph path (`_graph_turn`).
+
         Args:
             user_message: The user's input message
             conversation_id: Optional conversation ID for maintaining state
-            
+
         Returns:
             Generated response as a string
         """
+        return self._run_blocking(self._graph_turn(user_message, conversation_id))
+
+    async def _graph_turn(self, user_message: str, conversation_id: str = None) -> str:
+        """
+        Run one conversation turn through the compiled graph with ainvoke.
+
+        The async path frees the thread during LLM HTTPS round trips —
+        under the old run_in_executor wrapper every in-flight request held
+        an OS thread blocked on I/O for the full 1-3s of LLM latency.
+        """
         if not self.is_ready():
             raise RuntimeError("RAGOrchestrator is not ready. Call setup() first.")
-        
+
         if conversation_id is None:
             conversation_id = str(uuid.uuid4())
-        
-        config = {"configurable": {"thread_id": conversation_id}}
-        
+
+        config = _make_config(conversation_id)
+
         input_message = HumanMessage(content=user_message)
+        # interaction_count is last-write-wins and owned by the planner;
+        # seeding it here would wipe the persisted counter every turn.
+        # context is NotRequired and owned by the planner/tool nodes.
         initial_state = {
-            "messages": [input_message],
-            "context": "",
-            "interaction_count": 0
+            "messages": [input_message]
         }
-        
-        final_state = self._graph.invoke(initial_state, config=config)
-        
-        final_response = final_state['messages'][-1].content
-        
-        logger.info(f"[Conversation: {conversation_id}] Response generated successfully")
-        
-        interaction_count = final_state.get('interaction_count', 0)
-        logger.info(f"Current interaction count: {interaction_count}")
-        
-        tool_used = any(
-            hasattr(msg, 'tool_calls') and msg.tool_calls 
-            for msg in final_state['messages'] 
-            if hasattr(msg, 'tool_calls')
-        )
-        
+
+        # Transient LLM failures are retried inside the OpenAI client (see
+        # create_chat_model), which re-sends only the failed request. A
+        # graph-level retry would re-run the turn against state that
+        # already checkpointed the failed attempt's messages, duplicating
+        # the HumanMessage (and any dangling tool-calls AIMessage) in
+        # persistent history.
+        try:
+            final_response, tool_used, interaction_count = \
+                await self._stream_turn(initial_state, config)
+        finally:
+            # The checkpointer buffers per-node writes for the whole turn;
+            # commit them in one transaction (also on failure, so completed
+            # nodes' progress is not lost).
+            checkpointer = getattr(self._graph, "checkpointer", None)
+            if checkpointer is not None and hasattr(checkpointer, "flush"):
+                checkpointer.flush()
+
+        # %-style formatting so disabled levels never pay for string
+        # interpolation on the per-turn path.
+        logger.info("[Conversation: %s] Response generated successfully", conversation_id)
+        logger.info("Current interaction count: %d", interaction_count)
+
         if tool_used:
-            logger.info(f"[Conversation: {conversation_id}] RAG tool was used for this response")
+            logger.info("[Conversation: %s] RAG tool was used for this response", conversation_id)
         else:
-            logger.info(f"[Conversation: {conversation_id}] Response generated without RAG tool")
-            
+            logger.info("[Conversation: %s] Response generated without RAG tool", conversation_id)
+
         return final_response
+
+    async def _stream_turn(self, initial_state: Dict[str, Any], config: Dict[str, Any]):
+        """
+        Stream node updates and return the moment the final answer exists.
+
+        Awaiting ainvoke holds the request until every post-answer step
+        (END-edge bookkeeping, trailing checkpoint machinery) completes;
+        streaming updates instead lets the turn return as soon as a
+        non-tool AI message is emitted. Checkpoint writes for nodes that
+        already ran are buffered by the saver and committed by the
+        caller's flush, so the early exit loses nothing durable.
+        """
+        final_response = None
+        tool_used = False
+        interaction_count = 0
+
+        async for event in self._graph.astream(
+            initial_state, config=config, stream_mode="updates"
+        ):
+            for update in event.values():
+                if not update:
+                    continue
+                if "tool_used" in update:
+                    tool_used = update["tool_used"]
+                if "interaction_count" in update:
+                    interaction_count = update["interaction_count"]
+                messages = update.get("messages") or []
+                if messages:
+                    last = messages[-1]
+                    if last.type == "ai" and not getattr(last, "tool_calls", None):
+                        # Only a non-blank reply counts as the final answer:
+                        # an empty-content AIMessage must never ship to the
+                        # user (the caller's error path sends the fallback
+                        # message instead).
+                        content = last.content if isinstance(last.content, str) \
+                            else str(last.content)
+                        if content.strip():
+                            final_response = content
+            if final_response is not None:
+                break
+
+        if final_response is None:
+            raise RuntimeError("Graph run finished without producing a non-empty final answer")
+        return final_response, tool_used, interaction_count
     
     async def generate_response_async(self, user_message: str, conversation_id: str = None) -> str:
-        """Async wrapper for generate_response"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, 
-            functools.partial(self.generate_response, user_message, conversation_id)
+        """Native async entry point, throttled by the shared rate limiter"""
+        return await throttle_llm_call(
+            lambda: self._graph_turn(user_message, conversation_id),
+            estimate_tokens(user_message)
         )
     
     def cleanup(self):
         """Clean up resources"""
+        if hasattr(self, '_executor') and self._executor:
+            self._executor.shutdown(wait=False)
         if hasattr(self, 'vector_store_service') and self.vector_store_service:
             self.vector_store_service.cleanup()
         logger.info("RAGOrchestrator cleanup completed")
@@ -0,0 +1,107 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+from app.core.logging import get_logger
+
+logger = get_logger()
+
+"""
+Responsibilities:
+Exact and semantic caching of generated responses
+Short-circuiting LLM calls for recurring queries
+
+"""
+
+class ResponseCache:
+    """
+    Two-layer cache for generated responses, scoped per conversation.
+
+    Layer 1 is an exact-match LRU keyed by the SHA-256 of the conversation
+    id plus the query text. Layer 2 is a semantic lookup: queries are
+    embedded and compared by cosine similarity against recent entries of
+    the same conversation, so near-identical phrasings ("شحال الثمن؟" vs
+    "شحال الثمن عافاك؟") hit without an LLM round trip. WhatsApp support
+    traffic repeats the same handful of questions constantly, which is
+    exactly the workload this pays off on.
+
+    Scoping matters: replies depend on conversation context ("نعم" means
+    something different in every thread), so a process-global key would
+    hand one user another user's answer. Both layers are guarded by a
+    lock — get/put run concurrently off the event loop — and each
+    semantic entry is one (conversation, vector, response) tuple, so a
+    hit can never pair a vector with another query's response.
+    """
+
+    def __init__(self,
+                 embedding_model=None,
+                 max_entries: int = 512,
+                 similarity_threshold: float = 0.95):
+        self._embedding_model = embedding_model
+        self._similarity_threshold = similarity_threshold
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._exact: OrderedDict = OrderedDict()
+        self._semantic: List[Tuple[str, np.ndarray, str]] = []
+
+        logger.info(
+            f"ResponseCache initialized (semantic layer: "
+            f"{'enabled' if embedding_model else 'disabled'}, threshold: {similarity_threshold})"
+        )
+
+    @staticmethod
+    def _key(query: str, conversation_id: str) -> str:
+        return hashlib.sha256(
+            f"{conversation_id}\0{query.strip()}".encode("utf-8")
+        ).hexdigest()
+
+    def get(self, query: str, conversation_id: str = "") -> Optional[str]:
+        """Return a cached response for the query in this conversation, or
+        None on a miss."""
+        key = self._key(query, conversation_id)
+        with self._lock:
+            if key in self._exact:
+                self._exact.move_to_end(key)
+                logger.info("[ResponseCache] Exact-match hit")
+                return self._exact[key]
+            candidates = [
+                (vector, response) for cid, vector, response in self._semantic
+                if cid == conversation_id
+            ]
+
+        if self._embedding_model and candidates:
+            try:
+                # The embedding call is a network round trip — never made
+                # under the lock.
+                vector = np.asarray(self._embedding_model.embed_query(query))
+                vector = vector / np.linalg.norm(vector)
+                similarities = np.stack([v for v, _ in candidates]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self._similarity_threshold:
+                    logger.info(f"[ResponseCache] Semantic hit (similarity: {similarities[best]:.3f})")
+                    return candidates[best][1]
+            except Exception as e:
+                logger.warning(f"[ResponseCache] Semantic lookup failed, treating as miss: {e}")
+
+        return None
+
+    def put(self, query: str, response: str, conversation_id: str = ""):
+        """Insert a query/response pair into both cache layers."""
+        key = self._key(query, conversation_id)
+        with self._lock:
+            self._exact[key] = response
+            self._exact.move_to_end(key)
+            while len(self._exact) > self._max_entries:
+                self._exact.popitem(last=False)
+
+        if self._embedding_model:
+            try:
+                vector = np.asarray(self._embedding_model.embed_query(query))
+                vector = vector / np.linalg.norm(vector)
+                with self._lock:
+                    self._semantic.append((conversation_id, vector, response))
+                    while len(self._semantic) > self._max_entries:
+                        self._semantic.pop(0)
+            except Exception as e:
+                logger.warning(f"[ResponseCache] Could not embed query for semantic layer: {e}")
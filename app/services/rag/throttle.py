@@ -0,0 +1,82 @@
+import asyncio
+import os
+import time
+from app.core.logging import get_logger
+
+logger = get_logger()
+
+"""
+Shared throttling for OpenAI-bound work.
+
+Unbounded async fan-out trips the provider's RPM/TPM limits, and the
+resulting 429 retries serialize worse than a modestly bounded pipeline.
+Every async LLM entry point should go through `throttle_llm_call` so the
+whole process shares one concurrency gate and one token budget.
+"""
+
+_sem = asyncio.Semaphore(int(os.getenv("OPENAI_MAX_CONCURRENCY", "16")))
+
+
+class TokenBucket:
+    """
+    Simple token bucket tracking tokens-per-minute and requests-per-minute.
+
+    Capacities come from environment variables rather than a probe call;
+    defaults are conservative for a single production key.
+    """
+
+    def __init__(self,
+                 tokens_per_minute: int = None,
+                 requests_per_minute: int = None):
+        self.tokens_per_minute = tokens_per_minute or int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "90000"))
+        self.requests_per_minute = requests_per_minute or int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+        self._available_tokens = float(self.tokens_per_minute)
+        self._available_requests = float(self.requests_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._available_tokens = min(
+            self.tokens_per_minute,
+            self._available_tokens + elapsed * (self.tokens_per_minute / 60.0)
+        )
+        self._available_requests = min(
+            self.requests_per_minute,
+            self._available_requests + elapsed * (self.requests_per_minute / 60.0)
+        )
+
+    async def acquire(self, estimated_tokens: int):
+        """Wait until the bucket can cover one request of `estimated_tokens`."""
+        while True:
+            async with self._lock:
+                self._refill()
+                if self._available_tokens >= estimated_tokens and self._available_requests >= 1:
+                    self._available_tokens -= estimated_tokens
+                    self._available_requests -= 1
+                    return
+                token_wait = max(0.0, (estimated_tokens - self._available_tokens) / (self.tokens_per_minute / 60.0))
+                request_wait = max(0.0, (1 - self._available_requests) / (self.requests_per_minute / 60.0))
+                wait = max(token_wait, request_wait, 0.05)
+            logger.info(f"[Throttle] Rate limit budget exhausted, waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+
+_bucket = TokenBucket()
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars/token) to avoid a tokenizer on the hot path."""
+    return max(1, len(text) // 4)
+
+
+async def throttle_llm_call(coro_factory, estimated_tokens: int):
+    """
+    Run an awaitable produced by `coro_factory` under the shared semaphore
+    and token bucket.
+    """
+    async with _sem:
+        await _bucket.acquire(estimated_tokens)
+        return await coro_factory()
@@ -1,83 +1,166 @@
 from langchain_qdrant import Qdrant
 from qdrant_client import QdrantClient, models
 from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_core.documents import Document
+from app.services.rag.embedding_cache import CachedEmbeddings
 from typing import List, Optional, Dict, Any, Tuple, FrozenSet
 from dataclasses import dataclass
 from pathlib import Path
+from collections import OrderedDict
 from app.core.logging import get_logger
 from datetime import datetime
+import concurrent.futures
+import numpy as np
+import re
+import sys
+import threading
+import time
+import uuid
 
 # Configure logging
 logger = get_logger()
 
-@dataclass(frozen=True)
+# Compiled once: the two-pass replace().replace().isalnum() chain it
+# replaces re-scanned the name on every config construction.
+_NAME_RE = re.compile(r'^[A-Za-z0-9_-]+$')
+
+@dataclass(frozen=True, slots=True)
 class VectorStoreConfig:
-    """Immutable configuration for vector store"""
+    """
+    Immutable configuration for vector store.
+
+    hnsw_m / hnsw_ef_construct tune Qdrant's HNSW graph (log-time queries
+    instead of a linear scan once collections grow). quantization picks the
+    compressed representation used for scoring: "scalar" (int8, ~4x
+    smaller, near-lossless) suits this corpus; "product" (PQ, ~16x
+    smaller, table-lookup scoring) is for collections past ~100k vectors
+    where memory bandwidth dominates; "none" keeps raw float32.
+    """
     store_path: str
     collection_name: str
     embedding_model_name: str = "text-embedding-ada-002"
     max_documents_per_collection: int = 10000
-    
+    hnsw_m: int = 32
+    hnsw_ef_construct: int = 100
+    quantization: str = "scalar"
+    # Cosine similarity above which a differently-worded query reuses a
+    # cached SearchResult instead of hitting the index.
+    semantic_cache_threshold: float = 0.97
+    # Collections at or below this size are searched with a brute-force
+    # scan over an in-memory normalized matrix (one BLAS matvec) instead
+    # of going through the store client — at this scale the per-call
+    # client overhead dominates the actual distance computation. 0 disables.
+    dense_scan_max_documents: int = 50_000
+    # Storage dtype for the dense-scan matrix. The scan is memory-bandwidth
+    # bound, so f16 halves (and i8 quarters) the bytes streamed per query;
+    # with normalized vectors the ranking loss is negligible.
+    embedding_dtype: str = "f16"
+
     def __post_init__(self):
         """Fail Fast validation"""
         if not self.store_path or not self.store_path.strip():
             raise ValueError("store_path cannot be empty")
-        
+
         if not self.collection_name or not self.collection_name.strip():
             raise ValueError("collection_name cannot be empty")
-        
-        if not self.collection_name.replace('_', '').replace('-', '').isalnum():
+
+        if not _NAME_RE.match(self.collection_name):
             raise ValueError("collection_name must contain only alphanumeric characters, hyphens, and underscores")
-        
+
         if self.max_documents_per_collection <= 0:
             raise ValueError("max_documents_per_collection must be positive")
-    
+
+        if self.hnsw_m <= 0 or self.hnsw_ef_construct <= 0:
+            raise ValueError("hnsw_m and hnsw_ef_construct must be positive")
+
+        if self.quantization not in ("none", "scalar", "product"):
+            raise ValueError("quantization must be one of 'none', 'scalar', 'product'")
+
+        if not 0.0 < self.semantic_cache_threshold <= 1.0:
+            raise ValueError("semantic_cache_threshold must be in (0, 1]")
+
+        if self.dense_scan_max_documents < 0:
+            raise ValueError("dense_scan_max_documents cannot be negative")
+
+        if self.embedding_dtype not in ("f32", "f16", "i8"):
+            raise ValueError("embedding_dtype must be one of 'f32', 'f16', 'i8'")
+
     def with_collection_name(self, new_name: str) -> 'VectorStoreConfig':
         """Create new config with different collection name"""
         return VectorStoreConfig(
             store_path=self.store_path,
             collection_name=new_name,
             embedding_model_name=self.embedding_model_name,
-            max_documents_per_collection=self.max_documents_per_collection
+            max_documents_per_collection=self.max_documents_per_collection,
+            hnsw_m=self.hnsw_m,
+            hnsw_ef_construct=self.hnsw_ef_construct,
+            quantization=self.quantization,
+            semantic_cache_threshold=self.semantic_cache_threshold,
+            dense_scan_max_documents=self.dense_scan_max_documents,
+            embedding_dtype=self.embedding_dtype
         )
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SearchResult:
-    """Immutable search result"""
+    """Immutable search result. scores holds the similarity score per
+    document (same order); empty when the search path produced none.
+    search_time_ns is an epoch timestamp in nanoseconds — datetime.now()
+    costs tens of µs per call, noticeable on sub-ms cached searches, so
+    the datetime view is built lazily via the search_time property."""
     documents: Tuple[Document, ...]
     query: str
     collection_name: str
-    search_time: datetime
+    search_time_ns: int
     total_results: int
-    
+    scores: Tuple[float, ...] = ()
+
+    @property
+    def search_time(self) -> datetime:
+        return datetime.fromtimestamp(self.search_time_ns / 1e9)
+
     def __post_init__(self):
         """Fail Fast validation"""
         if not self.query.strip():
             raise ValueError("Query cannot be empty")
-        
+
         if not self.collection_name.strip():
             raise ValueError("Collection name cannot be empty")
-        
+
         if self.total_results < 0:
             raise ValueError("total_results cannot be negative")
-    
+
+        if self.scores and len(self.scores) != len(self.documents):
+            raise ValueError("scores must align with documents")
+
     def filter_by_score(self, min_score: float) -> 'SearchResult':
         """Return new SearchResult with filtered documents"""
-        filtered_docs = tuple(
-            doc for doc in self.documents 
-            if hasattr(doc, 'metadata') and doc.metadata.get('score', 0) >= min_score
-        )
-        
+        if self.scores:
+            # One vectorized comparison instead of a per-document Python
+            # loop — matters when fusing results from many collections.
+            scores = np.fromiter(self.scores, dtype=np.float32, count=len(self.scores))
+            keep = np.flatnonzero(scores >= min_score)
+            filtered_docs = tuple(self.documents[i] for i in keep)
+            filtered_scores = tuple(float(scores[i]) for i in keep)
+        else:
+            # Legacy results without scores: fall back to per-document
+            # metadata, as before.
+            filtered_docs = tuple(
+                doc for doc in self.documents
+                if hasattr(doc, 'metadata') and doc.metadata.get('score', 0) >= min_score
+            )
+            filtered_scores = ()
+
         return SearchResult(
             documents=filtered_docs,
             query=self.query,
             collection_name=self.collection_name,
-            search_time=self.search_time,
-            total_results=len(filtered_docs)
+            search_time_ns=self.search_time_ns,
+            total_results=len(filtered_docs),
+            scores=filtered_scores
         )
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CollectionInfo:
     """Immutable collection information"""
     name: str
@@ -105,22 +188,57 @@ class VectorStoreService:
             raise TypeError("config must be a VectorStoreConfig instance")
         
         self._config = config
-        self._embedding_model = embedding_model or OpenAIEmbeddings(
+        base_embeddings = embedding_model or OpenAIEmbeddings(
             model=config.embedding_model_name
         )
-        
+        # Every query and ingested chunk goes through this model; the cache
+        # turns repeated texts into dict lookups and persists across
+        # restarts next to the store directory.
+        self._embedding_model = CachedEmbeddings(
+            base_embeddings,
+            db_path=str(Path(config.store_path).parent / "embedding_cache.db")
+        )
+
         store_path = Path(config.store_path)
         store_path.mkdir(parents=True, exist_ok=True)
         self._client = QdrantClient(path=str(store_path))
         
         self._vector_stores: Dict[str, Qdrant] = {}
         self._collections_info: Dict[str, CollectionInfo] = {}
-        
-        logger.info(f"VectorStoreService (Qdrant) initialized at path: {config.store_path}")
+        self._retrievers: Dict[Tuple[str, str], 'VectorStoreRetriever'] = {}
+        # LRU of recent search results keyed on (collection, normalized
+        # query, k). Repeated FAQ questions follow a Zipf distribution, so
+        # hits skip the embedding forward-pass and the HNSW traversal.
+        # _search_cache_vectors holds the unit query embedding per key so
+        # near-identical rewordings can reuse a cached result too.
+        self._search_cache: 'OrderedDict[Tuple[str, str, int], SearchResult]' = OrderedDict()
+        self._search_cache_vectors: Dict[Tuple[str, str, int], np.ndarray] = {}
+        # Per-collection (documents, normalized embedding matrix) for the
+        # small-collection brute-force search path.
+        self._dense_cache: Dict[str, Tuple[List[Document], np.ndarray]] = {}
+        # Canonical metadata dicts: chunks from the same source file carry
+        # identical metadata, so sharing one dict (with interned string
+        # values) instead of thousands of copies cuts resident memory.
+        self._meta_pool: Dict[tuple, dict] = {}
+        # Compiled Qdrant Filter objects keyed on the filter dict's items.
+        self._filter_cache: Dict[FrozenSet, models.Filter] = {}
+        # (monotonic timestamp, stats dict) — see get_service_stats.
+        self._stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        # Embedding dimensionality, probed lazily once — see _vector_dim.
+        self._vector_size: Optional[int] = None
+        # Guards registry writes when collections are loaded concurrently
+        # (load_all_collections at warm start).
+        self._load_lock = threading.Lock()
+
+        logger.info("VectorStoreService (Qdrant) initialized at path: %s", config.store_path)
     
     @property
     def config(self) -> VectorStoreConfig:
         return self._config
+
+    @property
+    def embedding_model(self) -> Embeddings:
+        return self._embedding_model
     
     @property
     def available_collections(self) -> FrozenSet[str]:
@@ -139,13 +257,35 @@ class VectorStoreService:
         if not documents:
             raise ValueError("Documents list cannot be empty")
         
-        logger.info(f"Creating and populating Qdrant collection '{collection_name}' with {len(documents)} documents")
+        logger.info("Creating and populating Qdrant collection '%s' with %d documents", collection_name, len(documents))
         
         try:
-            vector_size = len(self._embedding_model.embed_query("test"))
+            vector_size = self._vector_dim()
+            quantization_config = None
+            if self._config.quantization == "scalar":
+                quantization_config = models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(
+                        type=models.ScalarType.INT8,
+                        always_ram=True
+                    )
+                )
+            elif self._config.quantization == "product":
+                # Qdrant trains the PQ codebooks itself — no explicit train
+                # step as FAISS would need.
+                quantization_config = models.ProductQuantization(
+                    product=models.ProductQuantizationConfig(
+                        compression=models.CompressionRatio.X16,
+                        always_ram=True
+                    )
+                )
             self._client.create_collection(
                 collection_name=collection_name,
-                vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE)
+                vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
+                hnsw_config=models.HnswConfigDiff(
+                    m=self._config.hnsw_m,
+                    ef_construct=self._config.hnsw_ef_construct
+                ),
+                quantization_config=quantization_config
             )
             
             vector_store = Qdrant(
@@ -154,7 +294,7 @@ class VectorStoreService:
                 embeddings=self._embedding_model
             )
 
-            vector_store.add_documents(documents, wait=True)
+            self._embed_and_upsert(collection_name, documents)
             self._vector_stores[collection_name] = vector_store
             
             now = datetime.now()
@@ -167,27 +307,35 @@ class VectorStoreService:
                 embedding_model=self._config.embedding_model_name
             )
             self._collections_info[collection_name] = collection_info
-            
-            logger.info(f"Collection '{collection_name}' created successfully in Qdrant")
+            self._stats_cache = None
+
+            logger.info("Collection '%s' created successfully in Qdrant", collection_name)
             return collection_info
             
         except Exception as e:
-            logger.error(f"Error creating Qdrant collection '{collection_name}': {e}", exc_info=True)
+            logger.error("Error creating Qdrant collection '%s': %s", collection_name, e, exc_info=True)
             if self.collection_exists(collection_name):
                 self._client.delete_collection(collection_name=collection_name)
             raise RuntimeError(f"Failed to create Qdrant collection '{collection_name}': {e}")
     
+    def _vector_dim(self) -> int:
+        """Embedding dimensionality, probed with one throwaway embedding on
+        first use and reused for every later collection creation."""
+        if self._vector_size is None:
+            self._vector_size = len(self._embedding_model.embed_query("test"))
+        return self._vector_size
+
     def load_collection(self, collection_name: str) -> Optional[CollectionInfo]:
         """Loads an existing Qdrant collection from disk."""
         if not self.collection_exists(collection_name):
-            logger.warning(f"Collection '{collection_name}' not found in Qdrant.")
+            logger.warning("Collection '%s' not found in Qdrant.", collection_name)
             return None
         
         if collection_name in self._vector_stores:
             return self._collections_info.get(collection_name)
 
         try:
-            logger.info(f"Loading collection '{collection_name}' from Qdrant")
+            logger.info("Loading collection '%s' from Qdrant", collection_name)
             vector_store = Qdrant(
                 client=self._client,
                 collection_name=collection_name,
@@ -195,34 +343,49 @@ class VectorStoreService:
             )
             
             doc_count = self._client.count(collection_name=collection_name, exact=True).count
-            self._vector_stores[collection_name] = vector_store
-            
+
             now = datetime.now()
             collection_info = CollectionInfo(
                 name=collection_name, document_count=doc_count, created_at=now,
                 last_updated=now, embedding_model=self._config.embedding_model_name
             )
-            self._collections_info[collection_name] = collection_info
-            
-            logger.info(f"Collection '{collection_name}' loaded successfully with {doc_count} documents")
+            with self._load_lock:
+                self._vector_stores[collection_name] = vector_store
+                self._collections_info[collection_name] = collection_info
+
+            logger.info("Collection '%s' loaded successfully with %d documents", collection_name, doc_count)
             return collection_info
             
         except Exception as e:
-            logger.error(f"Error loading Qdrant collection '{collection_name}': {e}", exc_info=True)
+            logger.error("Error loading Qdrant collection '%s': %s", collection_name, e, exc_info=True)
             return None
     
-    def add_documents_to_collection(self, 
+    def load_all_collections(self, max_workers: int = 8) -> Tuple[CollectionInfo, ...]:
+        """
+        Load every existing collection concurrently.
+
+        Each load pays a count round-trip to Qdrant, so opening dozens of
+        collections serially at warm start adds up; the opens are I/O-bound
+        and safe to run on a small thread pool. Collections that fail to
+        load are skipped (load_collection already logs the error).
+        """
+        names = sorted(self.available_collections)
+        if not names:
+            return ()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self.load_collection, names))
+        return tuple(info for info in results if info is not None)
+
+    def add_documents_to_collection(self,
                                    collection_name: str,
                                    documents: List[Document]) -> CollectionInfo:
         """Add documents to an existing collection."""
         if not self.load_collection(collection_name):
             raise ValueError(f"Collection '{collection_name}' does not exist. Create it first.")
         
-        vector_store = self._vector_stores[collection_name]
-        
         try:
-            vector_store.add_documents(documents, wait=True)
-            
+            self._embed_and_upsert(collection_name, documents)
+
             current_info = self._collections_info[collection_name]
             new_doc_count = self._client.count(collection_name=collection_name, exact=True).count
             updated_info = CollectionInfo(
@@ -230,45 +393,353 @@ class VectorStoreService:
                 last_updated=datetime.now(), embedding_model=current_info.embedding_model
             )
             self._collections_info[collection_name] = updated_info
+            self._evict_search_cache(collection_name)
+            self._stats_cache = None
             return updated_info
         except Exception as e:
-            logger.error(f"Error adding documents to collection '{collection_name}': {e}", exc_info=True)
+            logger.error("Error adding documents to collection '%s': %s", collection_name, e, exc_info=True)
             raise RuntimeError(f"Failed to add documents: {e}")
     
-    def search_collection(self, 
+    _SEARCH_CACHE_MAX = 512
+
+    def _intern_meta(self, meta: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return a shared canonical dict for this metadata content.
+
+        Keys and string values are sys.intern'ed and identical dicts
+        collapse to one instance. Metadata with unhashable values (lists,
+        nested dicts) is returned as-is.
+        """
+        if not meta:
+            return {}
+        try:
+            items = tuple(sorted(
+                (sys.intern(key), sys.intern(value) if isinstance(value, str) else value)
+                for key, value in meta.items()
+            ))
+            return self._meta_pool.setdefault(items, dict(items))
+        except TypeError:
+            return meta
+
+    # Texts per embedding API call during ingestion. The provider charges
+    # ~100ms of request overhead regardless of batch size, so large batches
+    # amortize it; 512 stays comfortably under token-per-request limits for
+    # typical chunk sizes.
+    _EMBED_BATCH = 512
+    # Embedding batches in flight at once during ingestion. The calls are
+    # network-bound, so overlapping them hides the provider round-trip
+    # latency; 8 stays well under typical rate limits.
+    _EMBED_CONCURRENCY = 8
+
+    def _embed_and_upsert(self, collection_name: str, documents: List[Document]) -> None:
+        """
+        Embed documents in large concurrent batches and upsert the vectors
+        as they become ready.
+
+        Routing through the store wrapper's add_documents embeds in its
+        default 64-text slices — one API round trip per slice. Pre-computing
+        embeddings 512 texts at a time, with batches overlapped on a small
+        thread pool and each batch upserted while the next ones are still
+        embedding, cuts the request count ~8x and pipelines the two I/O
+        stages. Payload keys match what the langchain Qdrant wrapper reads
+        back at search time.
+        """
+        # Single early-exit pass before paying for any embedding call; a
+        # bad document at index N would otherwise waste N embeddings.
+        bad = next(
+            (i for i, doc in enumerate(documents)
+             if not isinstance(doc, Document) or not doc.page_content
+             or not doc.page_content.strip()),
+            None
+        )
+        if bad is not None:
+            raise ValueError(f"Document at index {bad} is not a Document with non-empty content")
+
+        # Chunked corpora routinely repeat page_content (boilerplate
+        # headers, re-uploaded chunks); embed each distinct text once and
+        # fan the vector out, instead of paying the provider per duplicate.
+        seen: Dict[str, int] = {}
+        texts: List[str] = []
+        mapping: List[int] = []
+        for doc in documents:
+            index = seen.get(doc.page_content)
+            if index is None:
+                index = len(texts)
+                seen[doc.page_content] = index
+                texts.append(doc.page_content)
+            mapping.append(index)
+
+        batches = [
+            texts[start:start + self._EMBED_BATCH]
+            for start in range(0, len(texts), self._EMBED_BATCH)
+        ]
+        vectors: List[List[float]] = []
+        upserted_to = 0
+
+        def _upsert_ready() -> None:
+            # Upsert the prefix of documents whose vectors are embedded.
+            # Unique texts are appended in first-occurrence order, so
+            # mapping[i] < len(vectors) becomes true in document order.
+            nonlocal upserted_to
+            ready_to = upserted_to
+            while ready_to < len(documents) and mapping[ready_to] < len(vectors):
+                ready_to += 1
+            if ready_to == upserted_to:
+                return
+            points = [
+                models.PointStruct(
+                    id=uuid.uuid4().hex,
+                    vector=vectors[mapping[i]],
+                    payload={"page_content": documents[i].page_content,
+                             "metadata": self._intern_meta(documents[i].metadata)},
+                )
+                for i in range(upserted_to, ready_to)
+            ]
+            self._client.upsert(collection_name=collection_name, points=points, wait=True)
+            upserted_to = ready_to
+
+        if len(batches) <= 1:
+            for batch in batches:
+                vectors.extend(self._embedding_model.embed_documents(batch))
+            _upsert_ready()
+        else:
+            # executor.map preserves batch order and keeps later batches
+            # embedding in the background, so each upsert here overlaps the
+            # embedding of the batches behind it.
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self._EMBED_CONCURRENCY, len(batches))
+            ) as executor:
+                for batch_vectors in executor.map(
+                    self._embedding_model.embed_documents, batches
+                ):
+                    vectors.extend(batch_vectors)
+                    _upsert_ready()
+
+    def search_collection(self,
                          collection_name: str,
                          query: str,
                          k: int = 5,
                          filter_dict: Optional[Dict[str, Any]] = None) -> SearchResult:
-        """Search in a specific collection, converting dict filter to Qdrant filter."""
+        """
+        Search in a specific collection, converting dict filter to Qdrant filter.
+        Unfiltered searches are served from a small LRU keyed on the
+        normalized query, so identical questions skip the embedding call and
+        the index scan entirely. Filtered searches bypass the cache.
+        """
+        cache_key = None
+        if filter_dict is None:
+            cache_key = (collection_name, " ".join(query.lower().split()), k)
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                self._search_cache.move_to_end(cache_key)
+                logger.info("Search cache hit for collection '%s'", collection_name)
+                return cached
+
         if not self.load_collection(collection_name):
             raise ValueError(f"Collection '{collection_name}' does not exist.")
-        
+
         vector_store = self._vector_stores[collection_name]
-        
+
         try:
             qdrant_filter = self._create_qdrant_filter(filter_dict)
-            
-            search_start = datetime.now()
-            results = vector_store.similarity_search(query=query, k=k, filter=qdrant_filter)
-            
-            return SearchResult(
+            # time_ns is a single clock read; datetime.now() plus its
+            # timezone machinery is an order of magnitude slower.
+            search_start_ns = time.time_ns()
+
+            if cache_key is not None:
+                # One embedding call covers both the semantic-cache probe
+                # and, on a miss, the index search itself.
+                query_vector = np.asarray(self._embedding_model.embed_query(query), dtype=np.float32)
+                norm = np.linalg.norm(query_vector)
+                if norm > 0:
+                    query_vector = query_vector / norm
+
+                semantic_hit = self._semantic_cache_lookup(collection_name, k, query_vector)
+                if semantic_hit is not None:
+                    logger.info("Semantic search-cache hit for collection '%s'", collection_name)
+                    return semantic_hit
+
+                dense = self._dense_topk(collection_name, query_vector, k)
+                if dense is None:
+                    pairs = vector_store.similarity_search_with_score_by_vector(
+                        embedding=query_vector.tolist(), k=k
+                    )
+                    results = [doc for doc, _ in pairs]
+                    scores = tuple(float(score) for _, score in pairs)
+                else:
+                    results, scores = dense
+            else:
+                pairs = vector_store.similarity_search_with_score(
+                    query=query, k=k, filter=qdrant_filter
+                )
+                results = [doc for doc, _ in pairs]
+                scores = tuple(float(score) for _, score in pairs)
+
+            result = SearchResult(
                 documents=tuple(results), query=query, collection_name=collection_name,
-                search_time=search_start, total_results=len(results)
+                search_time_ns=search_start_ns, total_results=len(results), scores=scores
             )
+            if cache_key is not None:
+                self._search_cache[cache_key] = result
+                self._search_cache_vectors[cache_key] = query_vector
+                if len(self._search_cache) > self._SEARCH_CACHE_MAX:
+                    evicted_key, _ = self._search_cache.popitem(last=False)
+                    self._search_cache_vectors.pop(evicted_key, None)
+            return result
         except Exception as e:
-            logger.error(f"Error searching collection '{collection_name}': {e}", exc_info=True)
+            logger.error("Error searching collection '%s': %s", collection_name, e, exc_info=True)
             raise RuntimeError(f"Search failed: {e}")
 
+    def _semantic_cache_lookup(self, collection_name: str, k: int,
+                               query_vector: np.ndarray) -> Optional[SearchResult]:
+        """
+        Return a cached SearchResult whose query embedding is close enough
+        to the given one, or None. Only entries for the same collection and
+        k are candidates.
+        """
+        candidates = [
+            key for key in self._search_cache_vectors
+            if key[0] == collection_name and key[2] == k
+        ]
+        if not candidates:
+            return None
+
+        matrix = np.stack([self._search_cache_vectors[key] for key in candidates])
+        similarities = matrix @ query_vector
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self._config.semantic_cache_threshold:
+            best_key = candidates[best]
+            self._search_cache.move_to_end(best_key)
+            return self._search_cache[best_key]
+        return None
+
+    def _dense_topk(self, collection_name: str, query_vector: np.ndarray,
+                    k: int) -> Optional[Tuple[List[Document], Tuple[float, ...]]]:
+        """
+        Brute-force cosine top-k over an in-memory matrix as
+        (documents, scores), or None when the collection is too large for
+        the dense path.
+
+        For small collections one contiguous float32 matvec (BLAS, SIMD)
+        beats routing every query through the store client. The matrix is
+        built lazily from a single scroll and rows are L2-normalized, so
+        scoring is a dot product. argpartition keeps top-k selection O(N).
+        """
+        max_docs = self._config.dense_scan_max_documents
+        if max_docs == 0:
+            return None
+
+        cached = self._dense_cache.get(collection_name)
+        if cached is None:
+            if self._client.count(collection_name=collection_name, exact=True).count > max_docs:
+                return None
+            cached = self._build_dense_cache(collection_name)
+            if cached is None:
+                return None
+        documents, matrix = cached
+
+        if len(documents) == 0:
+            return [], ()
+
+        # Score according to the stored dtype; only the ranking matters,
+        # so reduced-precision accumulation is fine.
+        if matrix.dtype == np.int8:
+            query_q = np.clip(np.round(query_vector * 127), -127, 127).astype(np.int8)
+            similarities = np.einsum("ij,j->i", matrix, query_q, dtype=np.int32)
+            # Rescale int32 dot products back to the cosine range so the
+            # reported scores are comparable across dtypes.
+            score_scale = 1.0 / (127.0 * 127.0)
+        elif matrix.dtype == np.float16:
+            similarities = matrix @ query_vector.astype(np.float16)
+            score_scale = 1.0
+        else:
+            similarities = matrix @ query_vector
+            score_scale = 1.0
+        k = min(k, len(documents))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        scores = tuple(float(similarities[i]) * score_scale for i in top)
+        return [documents[i] for i in top], scores
+
+    def _build_dense_cache(self, collection_name: str) -> Optional[Tuple[List[Document], np.ndarray]]:
+        """Materialize all vectors and payloads of a collection in memory."""
+        try:
+            documents: List[Document] = []
+            vectors: List[List[float]] = []
+            offset = None
+            while True:
+                points, offset = self._client.scroll(
+                    collection_name=collection_name, limit=1024,
+                    with_payload=True, with_vectors=True, offset=offset
+                )
+                for point in points:
+                    payload = point.payload or {}
+                    documents.append(Document(
+                        page_content=payload.get("page_content", ""),
+                        metadata=self._intern_meta(payload.get("metadata"))
+                    ))
+                    vectors.append(point.vector)
+                if offset is None:
+                    break
+
+            matrix = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+            if matrix.size:
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix /= np.maximum(norms, 1e-12)
+            if self._config.embedding_dtype == "f16":
+                matrix = matrix.astype(np.float16)
+            elif self._config.embedding_dtype == "i8":
+                matrix = np.clip(np.round(matrix * 127), -127, 127).astype(np.int8)
+            self._dense_cache[collection_name] = (documents, matrix)
+            logger.info("Dense scan cache built for '%s': %d vectors", collection_name, len(documents))
+            return self._dense_cache[collection_name]
+        except Exception as e:
+            logger.error("Failed to build dense cache for '%s': %s", collection_name, e, exc_info=True)
+            return None
+
+    def _evict_search_cache(self, collection_name: str) -> None:
+        """Drop cached results for a collection whose contents changed."""
+        self._search_cache = OrderedDict(
+            (key, value) for key, value in self._search_cache.items()
+            if key[0] != collection_name
+        )
+        self._search_cache_vectors = {
+            key: vec for key, vec in self._search_cache_vectors.items()
+            if key[0] != collection_name
+        }
+        self._dense_cache.pop(collection_name, None)
+
     def _create_qdrant_filter(self, filter_dict: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+        """
+        Build (and memoize) the Qdrant Filter for a metadata filter dict.
+
+        Filter-heavy workloads reuse a handful of filters (tenant, language,
+        source), and each Filter construction runs pydantic validation per
+        condition — caching the compiled object keyed on the filter items
+        skips that on every call. Filters are read-only once built.
+        """
         if not filter_dict:
             return None
-        return models.Filter(
+        try:
+            filter_key = frozenset(filter_dict.items())
+        except TypeError:
+            # Unhashable filter values: compile without caching.
+            filter_key = None
+        if filter_key is not None:
+            cached = self._filter_cache.get(filter_key)
+            if cached is not None:
+                return cached
+        compiled = models.Filter(
             must=[
                 models.FieldCondition(key=f"metadata.{key}", match=models.MatchValue(value=value))
                 for key, value in filter_dict.items()
             ]
         )
+        if filter_key is not None:
+            if len(self._filter_cache) >= 128:
+                self._filter_cache.clear()
+            self._filter_cache[filter_key] = compiled
+        return compiled
     
     def get_collection_info(self, collection_name: str) -> Optional[CollectionInfo]:
         if not self.collection_exists(collection_name):
@@ -281,7 +752,7 @@ class VectorStoreService:
     def delete_collection(self, collection_name: str) -> bool:
         """Delete a collection and all its data."""
         if not self.collection_exists(collection_name):
-            logger.warning(f"Attempted to delete non-existent collection '{collection_name}'")
+            logger.warning("Attempted to delete non-existent collection '%s'", collection_name)
             return False
         
         try:
@@ -289,26 +760,50 @@ class VectorStoreService:
             if result:
                 self._vector_stores.pop(collection_name, None)
                 self._collections_info.pop(collection_name, None)
+                self._retrievers = {k: v for k, v in self._retrievers.items() if k[0] != collection_name}
+                self._evict_search_cache(collection_name)
+                self._stats_cache = None
             return result
         except Exception as e:
-            logger.error(f"Error deleting collection '{collection_name}': {e}", exc_info=True)
+            logger.error("Error deleting collection '%s': %s", collection_name, e, exc_info=True)
             return False
     
+    # How long a computed stats snapshot stays valid. Health-check polling
+    # hits this endpoint far more often than collections change; write
+    # paths invalidate eagerly, so the TTL only bounds staleness from
+    # out-of-process changes to the store.
+    _STATS_TTL_SECONDS = 5.0
+
     def get_service_stats(self) -> Dict[str, Any]:
+        if self._stats_cache is not None:
+            cached_at, stats = self._stats_cache
+            if time.monotonic() - cached_at < self._STATS_TTL_SECONDS:
+                return stats
+
         collections = self.list_collections()
-        return {
+        stats = {
             "total_collections": len(collections),
             "total_documents": sum(c.document_count for c in collections),
             "embedding_model": self._config.embedding_model_name,
             "store_path": self._config.store_path,
             "collections": [{"name": c.name, "document_count": c.document_count} for c in collections]
         }
+        self._stats_cache = (time.monotonic(), stats)
+        return stats
     
     def cleanup(self):
         """Clean up resources."""
         self._client.close()
         self._vector_stores.clear()
         self._collections_info.clear()
+        self._retrievers.clear()
+        self._search_cache.clear()
+        self._search_cache_vectors.clear()
+        self._dense_cache.clear()
+        self._meta_pool.clear()
+        self._filter_cache.clear()
+        if isinstance(self._embedding_model, CachedEmbeddings):
+            self._embedding_model.close()
         logger.info("VectorStoreService (Qdrant) resources cleaned up.")
 
     def collection_exists(self, collection_name: str) -> bool:
@@ -316,15 +811,27 @@ class VectorStoreService:
         return collection_name in {c.name for c in self._client.get_collections().collections}
         
     def as_retriever(self, collection_name: str, **kwargs) -> 'VectorStoreRetriever':
-        """Returns a LangChain retriever for a specific Qdrant collection."""
+        """
+        Returns a LangChain retriever for a specific Qdrant collection.
+        Retrievers are memoized per (collection, configuration), so repeated
+        tool creation across orchestrator rebuilds reuses the same object
+        instead of re-opening the collection.
+        """
+        cache_key = (collection_name, repr(sorted(kwargs.items())))
+        cached = self._retrievers.get(cache_key)
+        if cached is not None:
+            return cached
+
         if not self.load_collection(collection_name):
             raise ValueError(f"Collection '{collection_name}' does not exist or could not be loaded.")
-        
+
         vector_store = self._vector_stores[collection_name]
-        
+
         if 'search_kwargs' in kwargs and 'filter' in kwargs['search_kwargs']:
             filter_dict = kwargs['search_kwargs'].get('filter')
             kwargs['search_kwargs']['filter'] = self._create_qdrant_filter(filter_dict)
 
-        return vector_store.as_retriever(**kwargs)
+        retriever = vector_store.as_retriever(**kwargs)
+        self._retrievers[cache_key] = retriever
+        return retriever
 